@@ -0,0 +1,104 @@
+# Run-length connected-component labeling for compare_images.py. Kept in its
+# own module so numba is only imported (and the kernels compiled) when scipy
+# is unavailable. Component pixel counts are sums of the per-pixel weights.
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _find_root(parent, node):
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+@njit(cache=True)
+def run_length_labels(active, weights, width, height):
+    n_runs = 0
+    for y in range(height):
+        row = y * width
+        prev = 0
+        for x in range(width):
+            value = active[row + x]
+            if value and not prev:
+                n_runs += 1
+            prev = value
+
+    run_y = np.empty(n_runs, dtype=np.int32)
+    run_x0 = np.empty(n_runs, dtype=np.int32)
+    run_x1 = np.empty(n_runs, dtype=np.int32)
+    run_w = np.empty(n_runs, dtype=np.int64)
+    parent = np.empty(n_runs, dtype=np.int32)
+
+    # Pass 1: collect runs row by row and union each with the overlapping
+    # (4-connected) runs of the previous row. Roots always keep the smaller
+    # run index, so a component's root is its first run in raster order.
+    k = 0
+    prev_begin = 0
+    prev_end = 0
+    for y in range(height):
+        row = y * width
+        row_begin = k
+        scan = prev_begin
+        x = 0
+        while x < width:
+            if not active[row + x]:
+                x += 1
+                continue
+            x0 = x
+            w = 0
+            while x < width and active[row + x]:
+                w += weights[row + x]
+                x += 1
+            x1 = x - 1
+
+            run_y[k] = y
+            run_x0[k] = x0
+            run_x1[k] = x1
+            run_w[k] = w
+            parent[k] = k
+
+            while scan < prev_end and run_x1[scan] < x0:
+                scan += 1
+            j = scan
+            while j < prev_end and run_x0[j] <= x1:
+                a = _find_root(parent, j)
+                b = _find_root(parent, k)
+                if a < b:
+                    parent[b] = a
+                elif b < a:
+                    parent[a] = b
+                j += 1
+            k += 1
+        prev_begin = row_begin
+        prev_end = k
+
+    # Pass 2: fold every run into its root's bbox/pixel totals.
+    component = np.empty(n_runs, dtype=np.int32)
+    min_xs = np.empty(n_runs, dtype=np.int32)
+    min_ys = np.empty(n_runs, dtype=np.int32)
+    max_xs = np.empty(n_runs, dtype=np.int32)
+    max_ys = np.empty(n_runs, dtype=np.int32)
+    pixels = np.empty(n_runs, dtype=np.int64)
+    count = 0
+    for k in range(n_runs):
+        root = _find_root(parent, k)
+        if root == k:
+            component[k] = count
+            min_xs[count] = run_x0[k]
+            min_ys[count] = run_y[k]
+            max_xs[count] = run_x1[k]
+            max_ys[count] = run_y[k]
+            pixels[count] = run_w[k]
+            count += 1
+            continue
+        idx = component[root]
+        if run_x0[k] < min_xs[idx]:
+            min_xs[idx] = run_x0[k]
+        if run_x1[k] > max_xs[idx]:
+            max_xs[idx] = run_x1[k]
+        max_ys[idx] = run_y[k]
+        pixels[idx] += run_w[k]
+
+    return min_xs[:count], min_ys[:count], max_xs[:count], max_ys[:count], pixels[:count]
@@ -6,7 +6,7 @@ import math
 import os
 import sys
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 try:
     from PIL import Image, ImageDraw, ImageFont
@@ -946,8 +946,8 @@ def _default_meta_out(output_path: str) -> str:
     return f"{output_path}.json"
 
 
-def main() -> int:
-    if "--spec-help" in sys.argv:
+def main(argv: Optional[List[str]] = None) -> int:
+    if "--spec-help" in (sys.argv[1:] if argv is None else argv):
         print(SPEC_HELP.strip())
         return 0
 
@@ -961,7 +961,7 @@ def main() -> int:
     )
     parser.add_argument("--no-meta", action="store_true", help="Disable metadata sidecar output")
     parser.add_argument("--spec-help", action="store_true", help="Print spec schema and exit")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if args.spec_help:
         print(SPEC_HELP.strip())
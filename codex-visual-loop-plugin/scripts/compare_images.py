@@ -1,64 +1,188 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 import json
 import os
 import sys
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 try:
-    from PIL import Image, ImageChops, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw, ImageFont
 except Exception:
     print("error: Pillow is required. Install with: python3 -m pip install pillow", file=sys.stderr)
     sys.exit(2)
 
+try:
+    import numpy as np
+except Exception:
+    print("error: NumPy is required. Install with: python3 -m pip install numpy", file=sys.stderr)
+    sys.exit(2)
+
+
+# Parallel (min_x, min_y, max_x, max_y, pixels) arrays, one entry per component.
+_Components = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+_FOUR_CONNECTED = np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]], dtype=bool)
+_LUMA_WEIGHTS = np.array([19595, 38470, 7471], dtype=np.uint32)
+# 256 rows of a 4K RGBA frame is ~4 MB per input, small enough to stay in L2/L3.
+_TILE_ROWS = 256
+
 
 def load_image(path: str) -> Image.Image:
-    return Image.open(path).convert("RGBA")
+    image = Image.open(path)
+    # Only RGB channels are diffed, so RGB/RGBA sources are decoded straight
+    # into the NumPy view without a full-image convert("RGBA") copy.
+    if image.mode in ("RGB", "RGBA"):
+        return image
+    return image.convert("RGB")
 
 
-def _ensure_parent(path: str) -> None:
-    parent = os.path.dirname(path)
-    if parent:
-        os.makedirs(parent, exist_ok=True)
+def _ensure_parents(*paths: Optional[str]) -> None:
+    for parent in {os.path.dirname(path) for path in paths if path}:
+        if parent:
+            os.makedirs(parent, exist_ok=True)
 
 
-def _extract_change_regions(
-    gray: Image.Image,
+def _diff_tile(
+    base_arr: np.ndarray,
+    cur_arr: np.ndarray,
+    rows: slice,
     threshold: int,
-    min_pixels: int,
-    pad: int,
-    max_boxes: int,
-) -> List[Dict]:
-    width, height = gray.size
-    pix = gray.load()
-    active = bytearray(width * height)
-    visited = bytearray(width * height)
+    mask: np.ndarray,
+    overlay: Optional[np.ndarray],
+) -> Tuple[int, int]:
+    base_tile = base_arr[rows, :, :3]
+    cur_tile = cur_arr[rows, :, :3]
+    # |a - b| as max - min stays in uint8, so NumPy's SIMD loops work on
+    # 1-byte lanes instead of widening both tiles to int16 first.
+    diff = np.maximum(base_tile, cur_tile) - np.minimum(base_tile, cur_tile)
+    # Pillow's integer luma weights for convert("L"), so the result matches
+    # ImageChops.difference(...).convert("L") exactly.
+    gray = ((diff.astype(np.uint32) @ _LUMA_WEIGHTS + 0x8000) >> 16).astype(np.uint8)
+
+    np.greater(gray, threshold, out=mask[rows])
+    changed = int(np.count_nonzero(gray))
+    if overlay is not None:
+        if changed:
+            # Blend toward red using the gray bytes directly as alpha, in uint16
+            # fixed point: (cur * (255 - a) + red * a) / 255, rounded. Red only
+            # contributes to R, where it adds exactly `a`.
+            inv_alpha = (255 - gray).astype(np.uint16)[..., None]
+            blended = (cur_tile * inv_alpha + 127) // 255
+            blended[..., 0] += gray
+            overlay[rows] = blended
+        else:
+            # Unchanged tiles (the common case) blend to the current pixels.
+            overlay[rows] = cur_tile
 
-    for y in range(height):
-        row = y * width
-        for x in range(width):
-            if pix[x, y] > threshold:
-                active[row + x] = 1
+    return changed, int(gray.sum(dtype=np.uint64)) if changed else 0
 
-    regions: List[Dict] = []
+
+def _diff_pass(
+    baseline: Image.Image,
+    current: Image.Image,
+    threshold: int,
+    with_overlay: bool,
+) -> Tuple[np.ndarray, Optional[np.ndarray], int, int]:
+    # diff -> gray -> mask -> overlay fused per row tile, so each tile of the
+    # inputs is read once while cache-resident instead of once per stage.
+    # Tiles write disjoint rows and NumPy drops the GIL inside its kernels,
+    # so they can run on a thread pool.
+    base_arr = np.asarray(baseline)
+    cur_arr = np.asarray(current)
+    height, width = base_arr.shape[:2]
+    mask = np.empty((height, width), dtype=bool)
+    overlay = np.empty((height, width, 3), dtype=np.uint8) if with_overlay else None
+
+    tiles = [slice(top, top + _TILE_ROWS) for top in range(0, height, _TILE_ROWS)]
+    run_tile = functools.partial(
+        _diff_tile, base_arr, cur_arr, threshold=threshold, mask=mask, overlay=overlay
+    )
+    workers = min(len(tiles), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            totals = list(pool.map(run_tile, tiles))
+    else:
+        totals = [run_tile(rows) for rows in tiles]
+
+    changed = sum(count for count, _ in totals)
+    diff_sum = sum(tile_sum for _, tile_sum in totals)
+    return mask, overlay, changed, diff_sum
+
+
+def _label_components_scipy(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> _Components:
+    from scipy import ndimage
+
+    labels, count = ndimage.label(mask, structure=_FOUR_CONNECTED)
+    # Index 0 is background; every label 1..count has a non-empty slice.
+    if weights is None:
+        pixels = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+    else:
+        pixels = np.bincount(labels.ravel(), weights=weights.ravel(), minlength=count + 1)[1:].astype(np.int64)
+    bounds = np.array(
+        [(cols.start, rows.start, cols.stop - 1, rows.stop - 1) for rows, cols in ndimage.find_objects(labels)],
+        dtype=np.int64,
+    ).reshape(-1, 4)
+    return bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3], pixels
+
+
+@functools.lru_cache(maxsize=None)
+def _run_length_jit():
+    try:
+        from _ccl_jit import run_length_labels
+    except Exception:
+        return None
+    return run_length_labels
+
+
+def _label_components_jit(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> _Components:
+    height, width = mask.shape
+    active = np.ascontiguousarray(mask).ravel().view(np.uint8)
+    # Unweighted masks count each active pixel once via its own 0/1 byte.
+    weight = active if weights is None else np.ascontiguousarray(weights).ravel()
+    return _run_length_jit()(active, weight, width, height)
+
+
+def _label_components_flood(mask: np.ndarray, weights: Optional[np.ndarray] = None) -> _Components:
+    height, width = mask.shape
+    # Bool bytes are 0/1, so the flat mask indexes like a per-pixel bytearray
+    # and doubles as the unit weight of every active pixel.
+    active = bytearray(mask.tobytes())
+    weight = active if weights is None else weights.ravel().tolist()
+    visited = bytearray(width * height)
+    components = []
+    # Pixels are marked visited when pushed, so each active pixel is pushed at
+    # most once and the stack never outgrows the active count. Coordinates are
+    # kept in parallel lists, which avoids divmod on every pop; plain lists
+    # index faster than NumPy buffers from interpreted code.
+    capacity = active.count(1)
+    stack_x = [0] * capacity
+    stack_y = [0] * capacity
+    last_x = width - 1
+    last_y = height - 1
 
     for y in range(height):
+        row = y * width
         for x in range(width):
-            start = y * width + x
+            start = row + x
             if visited[start] or not active[start]:
                 continue
 
-            stack = [start]
             visited[start] = 1
+            stack_x[0] = x
+            stack_y[0] = y
+            sp = 1
             minx = maxx = x
             miny = maxy = y
             changed_pixels = 0
 
-            while stack:
-                node = stack.pop()
-                cx = node % width
-                cy = node // width
-                changed_pixels += 1
+            while sp:
+                sp -= 1
+                cx = stack_x[sp]
+                cy = stack_y[sp]
+                node = cy * width + cx
+                changed_pixels += weight[node]
 
                 if cx < minx:
                     minx = cx
@@ -73,62 +197,131 @@ def _extract_change_regions(
                     left = node - 1
                     if active[left] and not visited[left]:
                         visited[left] = 1
-                        stack.append(left)
-                if cx < width - 1:
+                        stack_x[sp] = cx - 1
+                        stack_y[sp] = cy
+                        sp += 1
+                if cx < last_x:
                     right = node + 1
                     if active[right] and not visited[right]:
                         visited[right] = 1
-                        stack.append(right)
+                        stack_x[sp] = cx + 1
+                        stack_y[sp] = cy
+                        sp += 1
                 if cy > 0:
                     up = node - width
                     if active[up] and not visited[up]:
                         visited[up] = 1
-                        stack.append(up)
-                if cy < height - 1:
+                        stack_x[sp] = cx
+                        stack_y[sp] = cy - 1
+                        sp += 1
+                if cy < last_y:
                     down = node + width
                     if active[down] and not visited[down]:
                         visited[down] = 1
-                        stack.append(down)
+                        stack_x[sp] = cx
+                        stack_y[sp] = cy + 1
+                        sp += 1
 
-            if changed_pixels < max(1, min_pixels):
-                continue
+            components.append((minx, miny, maxx, maxy, changed_pixels))
 
-            x0 = max(0, minx - pad)
-            y0 = max(0, miny - pad)
-            x1 = min(width - 1, maxx + pad)
-            y1 = min(height - 1, maxy + pad)
-            box_w = (x1 - x0) + 1
-            box_h = (y1 - y0) + 1
-            box_area = box_w * box_h
-
-            regions.append(
-                {
-                    "x": x0,
-                    "y": y0,
-                    "w": box_w,
-                    "h": box_h,
-                    "x2": x0 + box_w,
-                    "y2": y0 + box_h,
-                    "pixels": int(changed_pixels),
-                    "area": int(box_area),
-                    "coverage": round((changed_pixels / box_area), 4) if box_area else 0.0,
-                    "intent": "changed-region",
-                    "action": "inspect",
-                }
-            )
-
-    regions.sort(key=lambda item: item["pixels"], reverse=True)
+    columns = np.array(components, dtype=np.int64).reshape(-1, 5)
+    return columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3], columns[:, 4]
+
+
+@functools.lru_cache(maxsize=None)
+def _component_labeler():
+    # scipy and numba each add a few hundred ms of import time, so they are
+    # only loaded once a mask actually needs labeling, and numba only when
+    # scipy is unavailable.
+    try:
+        from scipy import ndimage
+    except Exception:
+        ndimage = None
+    if ndimage is not None:
+        return _label_components_scipy
+    if _run_length_jit() is not None:
+        return _label_components_jit
+    return _label_components_flood
+
+
+def _extract_change_regions(
+    mask: np.ndarray,
+    min_pixels: int,
+    pad: int,
+    max_boxes: int,
+    scale: int = 1,
+) -> List[Dict]:
+    height, width = mask.shape
+    # No component can reach min_pixels if the whole mask has fewer pixels,
+    # which short-circuits identical or near-identical frames.
+    if int(np.count_nonzero(mask)) < max(1, min_pixels):
+        return []
+
+    # Proposals only need coarse topology, so large frames can be labeled on a
+    # downsampled mask and mapped back. A cell is active if any pixel of its
+    # scale x scale block changed, so thin changes survive, and it is weighted
+    # by the block's real changed-pixel count, so min_pixels stays exact.
+    label_mask = mask
+    weights = None
+    if scale > 1:
+        pad_y = -height % scale
+        pad_x = -width % scale
+        if pad_y or pad_x:
+            label_mask = np.pad(mask, ((0, pad_y), (0, pad_x)))
+        weights = label_mask.reshape(
+            (height + pad_y) // scale, scale, (width + pad_x) // scale, scale
+        ).sum(axis=(1, 3), dtype=np.int64)
+        label_mask = weights > 0
+
+    components = _component_labeler()(label_mask, weights)
+
+    # Regions stay struct-of-arrays until the top max_boxes are chosen, so
+    # dicts are only built for regions that are actually reported.
+    min_xs, min_ys, max_xs, max_ys, pixels = components
+    if scale > 1:
+        min_xs = min_xs * scale
+        min_ys = min_ys * scale
+        max_xs = np.minimum(max_xs * scale + scale - 1, width - 1)
+        max_ys = np.minimum(max_ys * scale + scale - 1, height - 1)
+    keep = np.flatnonzero(pixels >= max(1, min_pixels))
+    # Stable sort keeps raster order among equally sized regions.
+    order = keep[np.argsort(-pixels[keep], kind="stable")]
     if max_boxes > 0:
-        regions = regions[:max_boxes]
+        order = order[:max_boxes]
 
-    for idx, region in enumerate(regions, start=1):
-        region["id"] = f"change-{idx}"
-        region["rel"] = {
-            "x": round(region["x"] / width, 6) if width else 0.0,
-            "y": round(region["y"] / height, 6) if height else 0.0,
-            "w": round(region["w"] / width, 6) if width else 0.0,
-            "h": round(region["h"] / height, 6) if height else 0.0,
-        }
+    x0s = np.maximum(min_xs[order] - pad, 0)
+    y0s = np.maximum(min_ys[order] - pad, 0)
+    box_ws = np.minimum(max_xs[order] + pad, width - 1) - x0s + 1
+    box_hs = np.minimum(max_ys[order] + pad, height - 1) - y0s + 1
+
+    regions: List[Dict] = []
+    for idx, (x0, y0, box_w, box_h, changed_pixels) in enumerate(
+        zip(x0s.tolist(), y0s.tolist(), box_ws.tolist(), box_hs.tolist(), pixels[order].tolist()),
+        start=1,
+    ):
+        box_area = box_w * box_h
+        regions.append(
+            {
+                "x": x0,
+                "y": y0,
+                "w": box_w,
+                "h": box_h,
+                "x2": x0 + box_w,
+                "y2": y0 + box_h,
+                "pixels": changed_pixels,
+                "area": box_area,
+                "coverage": round((changed_pixels / box_area), 4) if box_area else 0.0,
+                "intent": "changed-region",
+                "action": "inspect",
+                "id": f"change-{idx}",
+                "rel": {
+                    "x": round(x0 / width, 6) if width else 0.0,
+                    "y": round(y0 / height, 6) if height else 0.0,
+                    "w": round(box_w / width, 6) if width else 0.0,
+                    "h": round(box_h / height, 6) if height else 0.0,
+                },
+            }
+        )
 
     return regions
 
@@ -175,18 +368,23 @@ def _build_annotation_spec(regions: List[Dict]) -> Dict:
     }
 
 
-def _draw_annotations(current: Image.Image, gray: Image.Image, regions: List[Dict], out_path: str) -> str:
-    _ensure_parent(out_path)
-    overlay = Image.new("RGBA", current.size, (255, 0, 0, 0))
-    overlay.putalpha(gray)
-    vis = Image.alpha_composite(current, overlay)
-
+def _draw_annotations(vis: Image.Image, regions: List[Dict], out_path: str) -> None:
     draw = ImageDraw.Draw(vis)
     try:
         font = ImageFont.load_default()
     except Exception:
         font = None
 
+    # Labels are all "Δ<n>" in one font, so resolve the glyph fallback once and
+    # measure one bbox per digit count instead of calling textbbox per region.
+    prefix = "Δ"
+    label_boxes: Dict[int, Tuple[int, int, int, int]] = {}
+    if font:
+        try:
+            draw.textbbox((0, 0), f"{prefix}0", font=font)
+        except Exception:
+            prefix = "D"
+
     for idx, region in enumerate(regions, start=1):
         x = int(region["x"])
         y = int(region["y"])
@@ -194,25 +392,20 @@ def _draw_annotations(current: Image.Image, gray: Image.Image, regions: List[Dic
         h = int(region["h"])
         draw.rectangle([x, y, x + w, y + h], outline=(255, 69, 58, 255), width=3)
         if font:
-            label = f"Δ{idx}"
+            label = f"{prefix}{idx}"
+            digits = len(label) - len(prefix)
+            if digits not in label_boxes:
+                label_boxes[digits] = draw.textbbox((0, 0), prefix + "0" * digits, font=font)
+            left, top, right, bottom = label_boxes[digits]
             tx = x + 4
             ty = max(0, y - 16)
-            try:
-                bbox = draw.textbbox((tx, ty), label, font=font)
-            except Exception:
-                label = f"D{idx}"
-                bbox = draw.textbbox((tx, ty), label, font=font)
-            draw.rectangle([bbox[0] - 2, bbox[1] - 1, bbox[2] + 2, bbox[3] + 1], fill=(255, 69, 58, 220))
-            try:
-                draw.text((tx, ty), label, fill=(255, 255, 255, 255), font=font)
-            except Exception:
-                draw.text((tx, ty), f"{idx}", fill=(255, 255, 255, 255), font=font)
-
-    vis.convert("RGB").save(out_path)
-    return os.path.abspath(out_path)
-
-
-def main() -> int:
+            draw.rectangle([tx + left - 2, ty + top - 1, tx + right + 2, ty + bottom + 1], fill=(255, 69, 58, 220))
+            draw.text((tx, ty), label, fill=(255, 255, 255, 255), font=font)
+
+    vis.save(out_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Compare two images and output diff metrics.")
     parser.add_argument("baseline", help="Path to baseline image")
     parser.add_argument("current", help="Path to current image")
@@ -223,9 +416,15 @@ def main() -> int:
     parser.add_argument("--bbox-min-area", type=int, default=64, help="Minimum changed pixels per region (default: 64)")
     parser.add_argument("--bbox-pad", type=int, default=2, help="Padding around each bbox (default: 2)")
     parser.add_argument("--max-boxes", type=int, default=16, help="Maximum number of change regions (default: 16)")
+    parser.add_argument(
+        "--bbox-scale",
+        type=int,
+        default=1,
+        help="Find regions on a mask downsampled by this factor; boxes snap to the block grid (default: 1)",
+    )
     parser.add_argument("--annotated-out", help="Path to write annotated current image with change boxes")
     parser.add_argument("--annotate-spec-out", help="Path to write annotate_image-compatible JSON spec")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not os.path.exists(args.baseline):
         print(f"error: baseline not found: {args.baseline}", file=sys.stderr)
@@ -246,47 +445,50 @@ def main() -> int:
             print("error: image sizes differ. Re-run with --resize to match baseline size.", file=sys.stderr)
             return 1
 
-    diff = ImageChops.difference(baseline, current)
-    gray = diff.convert("L")
-    hist = gray.histogram()
-    total = sum(hist)
-    changed = total - hist[0] if total else 0
-    avg = sum(i * c for i, c in enumerate(hist)) / (255 * total) if total else 0.0
+    diff_path = os.path.abspath(args.diff_out) if args.diff_out else None
+    json_path = os.path.abspath(args.json_out) if args.json_out else None
+    annotated_path = os.path.abspath(args.annotated_out) if args.annotated_out else None
+    annotate_spec_path = os.path.abspath(args.annotate_spec_out) if args.annotate_spec_out else None
+    _ensure_parents(diff_path, json_path, annotated_path, annotate_spec_path)
+
+    mask, overlay, changed, diff_sum = _diff_pass(
+        baseline,
+        current,
+        threshold=max(0, min(255, int(args.bbox_threshold))),
+        with_overlay=bool(args.diff_out or args.annotated_out),
+    )
+    total = int(mask.size)
+    # Exact integer sum keeps avg identical to the histogram-weighted form.
+    avg = diff_sum / (255 * total) if total else 0.0
     percent_changed = (changed / total * 100) if total else 0.0
     avg_diff_percent = avg * 100
 
     regions = _extract_change_regions(
-        gray,
-        threshold=max(0, min(255, int(args.bbox_threshold))),
+        mask,
         min_pixels=max(1, int(args.bbox_min_area)),
         pad=max(0, int(args.bbox_pad)),
         max_boxes=max(0, int(args.max_boxes)),
+        scale=max(1, int(args.bbox_scale)),
     )
 
-    diff_path = None
-    if args.diff_out:
-        diff_path = args.diff_out
-        _ensure_parent(diff_path)
-        overlay = Image.new("RGBA", current.size, (255, 0, 0, 0))
-        overlay.putalpha(gray)
-        Image.alpha_composite(current, overlay).convert("RGB").save(diff_path)
+    # One composited image serves both outputs; annotations are drawn onto it
+    # only after the plain diff image has been saved.
+    vis = Image.fromarray(overlay, "RGB") if overlay is not None else None
+    if diff_path:
+        vis.save(diff_path)
 
-    annotate_spec_path = None
     annotate_spec = _build_annotation_spec(regions)
-    if args.annotate_spec_out:
-        annotate_spec_path = os.path.abspath(args.annotate_spec_out)
-        _ensure_parent(annotate_spec_path)
+    if annotate_spec_path:
         with open(annotate_spec_path, "w", encoding="utf-8") as f:
             json.dump(annotate_spec, f, indent=2)
 
-    annotated_path = None
-    if args.annotated_out:
-        annotated_path = _draw_annotations(current, gray, regions, args.annotated_out)
+    if annotated_path:
+        _draw_annotations(vis, regions, annotated_path)
 
     result = {
         "baseline": os.path.abspath(args.baseline),
         "current": os.path.abspath(args.current),
-        "diff_image": os.path.abspath(diff_path) if diff_path else None,
+        "diff_image": diff_path,
         "annotated_image": annotated_path,
         "annotate_spec": annotate_spec_path,
         "percent_changed": round(percent_changed, 3),
@@ -297,12 +499,13 @@ def main() -> int:
         "change_region_count": len(regions),
     }
 
-    if args.json_out:
-        _ensure_parent(args.json_out)
-        with open(args.json_out, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2)
+    # Serialized once: the report file and stdout carry the same compact line.
+    text = json.dumps(result)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
 
-    print(json.dumps(result))
+    print(text)
     return 0
 
 
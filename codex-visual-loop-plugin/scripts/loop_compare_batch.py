@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+import annotate_image
+import compare_images
+
+
+def _default_loop_dir() -> str:
+    out_root = os.environ.get("CVLP_OUT_DIR") or ".codex-visual-loop"
+    loop_dir = os.environ.get("CVLP_LOOP_DIR")
+    if loop_dir:
+        return loop_dir
+    # Backward-compat: keep using the legacy layout when the new one doesn't exist yet.
+    if os.path.isdir(os.path.join(out_root, "baselines")) and not os.path.isdir(
+        os.path.join(out_root, "loop", "baselines")
+    ):
+        return out_root
+    return os.path.join(out_root, "loop")
+
+
+def _safe_name(label: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]", "", label.translate(str.maketrans(" /:", "___")))
+    return name or "baseline"
+
+
+def _run_step(args: argparse.Namespace, current: str, label: str, ts: str) -> Optional[str]:
+    safe_name = _safe_name(label)
+    dirs = {
+        key: os.path.join(args.loop_dir, key)
+        for key in ("baselines", "latest", "history", "diffs", "reports", "annotations")
+    }
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    baseline_path = os.path.join(dirs["baselines"], f"{safe_name}.png")
+    latest_path = os.path.join(dirs["latest"], f"{safe_name}.png")
+    history_path = os.path.join(dirs["history"], f"{safe_name}-{ts}.png")
+    diff_path = os.path.join(dirs["diffs"], f"{safe_name}-{ts}.png")
+    json_path = os.path.join(dirs["reports"], f"{safe_name}-{ts}.json")
+    annotated_path = os.path.join(dirs["annotations"], f"{safe_name}-{ts}.png")
+    annotate_spec_path = os.path.join(dirs["reports"], f"{safe_name}-{ts}-change-spec.json")
+
+    shutil.copyfile(current, latest_path)
+    shutil.copyfile(current, history_path)
+
+    if not os.path.isfile(baseline_path):
+        shutil.copyfile(current, baseline_path)
+        return json.dumps(
+            {
+                "baseline_created": os.path.abspath(baseline_path),
+                "latest": os.path.abspath(latest_path),
+                "history": os.path.abspath(history_path),
+            }
+        )
+
+    compare_args = [
+        baseline_path,
+        current,
+        "--diff-out",
+        diff_path,
+        "--json-out",
+        json_path,
+        "--bbox-threshold",
+        str(args.bbox_threshold),
+        "--bbox-min-area",
+        str(args.bbox_min_area),
+        "--bbox-pad",
+        str(args.bbox_pad),
+        "--max-boxes",
+        str(args.max_boxes),
+    ]
+    if args.resize:
+        compare_args.append("--resize")
+    if not args.no_annotated:
+        compare_args += ["--annotate-spec-out", annotate_spec_path]
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        rc = compare_images.main(compare_args)
+    if rc != 0:
+        return None
+    # compare_images already wrote this exact line to the report.
+    text = out.getvalue().strip()
+
+    if not args.no_annotated and os.path.isfile(annotate_spec_path):
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                rc = annotate_image.main([current, annotated_path, "--spec", annotate_spec_path, "--no-meta"])
+        except (Exception, SystemExit):
+            rc = 1
+        if rc == 0:
+            payload = json.loads(text)
+            payload["annotated_image"] = os.path.abspath(annotated_path)
+            payload["annotate_spec"] = os.path.abspath(annotate_spec_path)
+            text = json.dumps(payload)
+            with open(json_path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print("warn: failed to render annotated diff image using annotate_image.py", file=sys.stderr)
+
+    if args.update_baseline:
+        shutil.copyfile(current, baseline_path)
+    return text
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare screenshots against stored baselines, one JSON line per pair. "
+        "Pairs are processed in order, so a label's first image seeds the baseline for later ones."
+    )
+    parser.add_argument("pairs", nargs="+", metavar="IMAGE LABEL", help="Current image path followed by baseline name")
+    parser.add_argument(
+        "--loop-dir",
+        default=_default_loop_dir(),
+        help="Override loop storage directory (default: $CVLP_LOOP_DIR or .codex-visual-loop/loop)",
+    )
+    parser.add_argument("--resize", action="store_true", help="Resize current image to match baseline size")
+    parser.add_argument("--update-baseline", action="store_true", help="Replace baseline with current after comparison")
+    parser.add_argument("--no-annotated", action="store_true", help="Skip generating annotated change-region image/spec")
+    parser.add_argument("--bbox-threshold", type=int, default=24, help="Pixel diff threshold (default: 24)")
+    parser.add_argument("--bbox-min-area", type=int, default=64, help="Min changed pixels per bbox (default: 64)")
+    parser.add_argument("--bbox-pad", type=int, default=2, help="Padding around each bbox (default: 2)")
+    parser.add_argument("--max-boxes", type=int, default=16, help="Maximum number of change boxes (default: 16)")
+    args = parser.parse_args(argv)
+
+    if len(args.pairs) % 2:
+        parser.error("expected <current_path> <baseline_name> pairs")
+    steps = list(zip(args.pairs[::2], args.pairs[1::2]))
+    for current, _ in steps:
+        if not os.path.isfile(current):
+            print(f"error: current image not found: {current}", file=sys.stderr)
+            return 1
+
+    # Steps share one timestamp, so an index keeps their artifacts apart; a
+    # single step (loop_compare.sh) keeps the plain timestamp.
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    for idx, (current, label) in enumerate(steps):
+        result = _run_step(args, current, label, f"{ts}-{idx:03}" if len(steps) > 1 else ts)
+        if result is None:
+            return 1
+        print(result, flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
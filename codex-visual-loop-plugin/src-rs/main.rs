@@ -1,6 +1,6 @@
 use anyhow::{bail, Context, Result};
 use chrono::Utc;
-use clap::{ArgAction, Args, Parser, Subcommand};
+use clap::{ArgAction, Args, CommandFactory, Parser, Subcommand};
 use font8x8::{UnicodeFonts, BASIC_FONTS};
 use image::imageops::FilterType;
 use image::{DynamicImage, GenericImageView, ImageBuffer, Pixel, Rgba, RgbaImage};
@@ -84,6 +84,9 @@ enum Commands {
     /// Capture app + AX packet and optionally ask Codex CLI for a detailed explanation report
     #[command(name = "explain-app")]
     ExplainApp(ExplainArgs),
+    /// Print --help text for several commands as one JSON object
+    #[command(name = "help-bundle")]
+    HelpBundle(HelpBundleArgs),
 }
 
 #[derive(Args, Debug)]
@@ -176,9 +179,14 @@ struct DiffArgs {
 #[derive(Args, Debug)]
 struct LoopArgs {
     /// Current screenshot/image path
-    current_path: PathBuf,
+    #[arg(required_unless_present = "batch")]
+    current_path: Option<PathBuf>,
     /// Baseline key name
-    baseline_name: String,
+    #[arg(required_unless_present = "batch")]
+    baseline_name: Option<String>,
+    /// JSON array of {"image", "label", ...} steps to run in order in one process
+    #[arg(long, conflicts_with_all = ["current_path", "baseline_name"])]
+    batch: Option<PathBuf>,
     /// Loop storage directory override
     #[arg(long)]
     loop_dir: Option<PathBuf>,
@@ -205,6 +213,34 @@ struct LoopArgs {
     max_boxes: usize,
 }
 
+/// One `loop --batch` step; unset fields fall back to the command-line flags.
+/// Unknown keys are rejected so a misspelled override cannot silently fall back.
+#[derive(Debug, serde::Deserialize)]
+#[serde(deny_unknown_fields)]
+struct LoopBatchEntry {
+    image: PathBuf,
+    label: String,
+    resize: Option<bool>,
+    update_baseline: Option<bool>,
+    no_annotated: Option<bool>,
+    bbox_threshold: Option<u8>,
+    bbox_min_area: Option<u32>,
+    bbox_pad: Option<u32>,
+    max_boxes: Option<usize>,
+}
+
+struct LoopStep<'a> {
+    current_path: &'a Path,
+    baseline_name: &'a str,
+    resize: bool,
+    update_baseline: bool,
+    emit_annotated: bool,
+    bbox_threshold: u8,
+    bbox_min_area: u32,
+    bbox_pad: u32,
+    max_boxes: usize,
+}
+
 #[derive(Args, Debug)]
 struct ObserveArgs {
     /// App process name to observe (default: frontmost app)
@@ -338,6 +374,13 @@ struct ExplainArgs {
     json: bool,
 }
 
+#[derive(Args, Debug)]
+struct HelpBundleArgs {
+    /// Comma-separated command names (default: every command)
+    #[arg(long, value_delimiter = ',')]
+    names: Vec<String>,
+}
+
 #[derive(Debug, Clone, serde::Serialize)]
 struct ChangeRegion {
     x: u32,
@@ -481,6 +524,7 @@ fn run() -> Result<()> {
         Commands::AxTree(args) => command_ax_tree(args),
         Commands::Act(args) => command_act(args),
         Commands::ExplainApp(args) => command_explain_app(args),
+        Commands::HelpBundle(args) => command_help_bundle(args),
     }
 }
 
@@ -535,6 +579,37 @@ fn print_commands() -> Result<()> {
     Ok(())
 }
 
+fn command_help_bundle(args: HelpBundleArgs) -> Result<()> {
+    let mut cli = Cli::command();
+    // Building the root first propagates bin names, so each usage line reads
+    // "codex-visual-loop <command>" exactly as `<command> --help` prints it.
+    cli.build();
+
+    let names: Vec<String> = if args.names.is_empty() {
+        cli.get_subcommands()
+            .map(|sub| sub.get_name().to_string())
+            .filter(|name| name != "help-bundle")
+            .collect()
+    } else {
+        args.names
+            .iter()
+            .map(|name| name.trim().to_string())
+            .filter(|name| !name.is_empty())
+            .collect()
+    };
+
+    let mut bundle = Map::new();
+    for name in names {
+        let Some(sub) = cli.find_subcommand_mut(&name) else {
+            bail!("unknown command for help-bundle: {name}");
+        };
+        bundle.insert(name, Value::String(sub.render_long_help().to_string()));
+    }
+
+    println!("{}", serde_json::to_string(&Value::Object(bundle))?);
+    Ok(())
+}
+
 fn print_manifest() -> Result<()> {
     let manifest_path = Path::new(PLUGIN_ROOT).join("manifest.json");
     let raw = fs::read_to_string(&manifest_path)
@@ -789,21 +864,69 @@ fn command_diff(args: DiffArgs) -> Result<()> {
 }
 
 fn command_loop(args: LoopArgs) -> Result<()> {
-    if !args.current_path.exists() {
-        bail!("current image not found: {}", args.current_path.display());
+    let loop_dir = resolve_loop_dir(args.loop_dir.clone());
+
+    let Some(batch_path) = args.batch.as_deref() else {
+        let current_path = args.current_path.as_deref().context("missing current image path")?;
+        let baseline_name = args.baseline_name.as_deref().context("missing baseline name")?;
+        let step = LoopStep {
+            current_path,
+            baseline_name,
+            resize: args.resize,
+            update_baseline: args.update_baseline,
+            emit_annotated: !args.no_annotated,
+            bbox_threshold: args.bbox_threshold,
+            bbox_min_area: args.bbox_min_area,
+            bbox_pad: args.bbox_pad,
+            max_boxes: args.max_boxes,
+        };
+        let payload = run_loop_step(&loop_dir, &step, &timestamp_compact())?;
+        println!("{}", serde_json::to_string(&payload)?);
+        return Ok(());
+    };
+
+    let raw = fs::read_to_string(batch_path)
+        .with_context(|| format!("failed to read loop batch: {}", batch_path.display()))?;
+    let entries: Vec<LoopBatchEntry> = serde_json::from_str(&raw)
+        .with_context(|| format!("invalid loop batch JSON: {}", batch_path.display()))?;
+
+    let ts = timestamp_compact();
+    for (idx, entry) in entries.iter().enumerate() {
+        let step = LoopStep {
+            current_path: &entry.image,
+            baseline_name: &entry.label,
+            resize: entry.resize.unwrap_or(args.resize),
+            update_baseline: entry.update_baseline.unwrap_or(args.update_baseline),
+            emit_annotated: !entry.no_annotated.unwrap_or(args.no_annotated),
+            bbox_threshold: entry.bbox_threshold.unwrap_or(args.bbox_threshold),
+            bbox_min_area: entry.bbox_min_area.unwrap_or(args.bbox_min_area),
+            bbox_pad: entry.bbox_pad.unwrap_or(args.bbox_pad),
+            max_boxes: entry.max_boxes.unwrap_or(args.max_boxes),
+        };
+        // Steps usually land within the same second, so the index keeps their
+        // history/diff/report names distinct.
+        let payload = run_loop_step(&loop_dir, &step, &format!("{ts}-{idx:03}"))?;
+        // One JSON line per finished step, so earlier results are already out
+        // if a later step fails.
+        let mut stdout = io::stdout().lock();
+        writeln!(stdout, "{}", serde_json::to_string(&payload)?)?;
+        stdout.flush()?;
     }
 
+    Ok(())
+}
+
+fn resolve_loop_dir(loop_dir_arg: Option<PathBuf>) -> PathBuf {
     let out_root = out_root();
     let legacy_baselines = out_root.join("baselines");
     let new_baselines = out_root.join("loop").join("baselines");
 
-    let mut loop_dir = args
-        .loop_dir
-        .clone()
+    let explicit = loop_dir_arg.is_some();
+    let mut loop_dir = loop_dir_arg
         .or_else(|| env::var("CVLP_LOOP_DIR").ok().map(PathBuf::from))
         .unwrap_or_else(|| out_root.join("loop"));
 
-    if args.loop_dir.is_none()
+    if !explicit
         && env::var("CVLP_LOOP_DIR").is_err()
         && legacy_baselines.exists()
         && !new_baselines.exists()
@@ -811,8 +934,15 @@ fn command_loop(args: LoopArgs) -> Result<()> {
         loop_dir = out_root;
     }
 
-    let safe_name = sanitize_baseline_name(&args.baseline_name);
-    let ts = timestamp_compact();
+    loop_dir
+}
+
+fn run_loop_step(loop_dir: &Path, step: &LoopStep, ts: &str) -> Result<Value> {
+    if !step.current_path.exists() {
+        bail!("current image not found: {}", step.current_path.display());
+    }
+
+    let safe_name = sanitize_baseline_name(step.baseline_name);
 
     let base_baselines = loop_dir.join("baselines");
     let base_latest = loop_dir.join("latest");
@@ -841,49 +971,45 @@ fn command_loop(args: LoopArgs) -> Result<()> {
     let annotated_path = base_annotations.join(format!("{safe_name}-{ts}.png"));
     let annotate_spec_path = base_reports.join(format!("{safe_name}-{ts}-change-spec.json"));
 
-    copy_file(&args.current_path, &latest_path)?;
-    copy_file(&args.current_path, &history_path)?;
+    copy_file(step.current_path, &latest_path)?;
+    copy_file(step.current_path, &history_path)?;
 
     if !baseline_path.exists() {
-        copy_file(&args.current_path, &baseline_path)?;
-        let payload = json!({
+        copy_file(step.current_path, &baseline_path)?;
+        return Ok(json!({
             "baseline_created": abs_path(&baseline_path).display().to_string(),
             "latest": abs_path(&latest_path).display().to_string(),
             "history": abs_path(&history_path).display().to_string(),
-        });
-        println!("{}", serde_json::to_string(&payload)?);
-        return Ok(());
+        }));
     }
 
-    let emit_annotated = !args.no_annotated;
     let diff_output = run_diff_internal(
         &baseline_path,
-        &args.current_path,
+        step.current_path,
         Some(&diff_path),
         Some(&json_path),
-        args.resize,
-        args.bbox_threshold,
-        args.bbox_min_area,
-        args.bbox_pad,
-        args.max_boxes,
-        if emit_annotated {
+        step.resize,
+        step.bbox_threshold,
+        step.bbox_min_area,
+        step.bbox_pad,
+        step.max_boxes,
+        if step.emit_annotated {
             Some(&annotated_path)
         } else {
             None
         },
-        if emit_annotated {
+        if step.emit_annotated {
             Some(&annotate_spec_path)
         } else {
             None
         },
     )?;
 
-    if args.update_baseline {
-        copy_file(&args.current_path, &baseline_path)?;
+    if step.update_baseline {
+        copy_file(step.current_path, &baseline_path)?;
     }
 
-    println!("{}", serde_json::to_string(&diff_output.json)?);
-    Ok(())
+    Ok(diff_output.json)
 }
 
 fn command_observe(args: ObserveArgs) -> Result<()> {
@@ -955,7 +1081,8 @@ fn command_observe(args: ObserveArgs) -> Result<()> {
     clip_file.write_all(b"codex-visual-loop placeholder clip\n")?;
 
     if args.duration > 0 {
-        thread::sleep(Duration::from_secs(args.duration.min(30)));
+        // The packet still reports the requested duration; only the wait shrinks.
+        thread::sleep(Duration::from_secs(args.duration.min(30)).mul_f64(time_scale()));
     }
 
     let after_payload = capture_internal(
@@ -4941,6 +5068,16 @@ fn out_root() -> PathBuf {
         .unwrap_or_else(|| PathBuf::from(".codex-visual-loop"))
 }
 
+/// Wall-clock multiplier for observe waits (OMX_VISUAL_LOOP_TIME_SCALE, clamped to 0..=1).
+fn time_scale() -> f64 {
+    env::var("OMX_VISUAL_LOOP_TIME_SCALE")
+        .ok()
+        .and_then(|v| v.trim().parse::<f64>().ok())
+        .filter(|scale| scale.is_finite())
+        .map(|scale| scale.clamp(0.0, 1.0))
+        .unwrap_or(1.0)
+}
+
 fn abs_path(path: &Path) -> PathBuf {
     if path.is_absolute() {
         return path.to_path_buf();
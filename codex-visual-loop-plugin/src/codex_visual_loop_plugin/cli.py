@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import json
 import os
 import shutil
 import subprocess
@@ -11,6 +13,7 @@ from pathlib import Path
 PLUGIN_ROOT = Path(__file__).resolve().parents[2]
 MANIFEST_PATH = PLUGIN_ROOT / "Cargo.toml"
 ENV_BIN = "CODEX_VISUAL_LOOP_RUST_BIN"
+PYTHON_COMMANDS = ("visual-loop-feedback",)
 
 
 def _candidate_binaries() -> list[Path]:
@@ -21,79 +24,129 @@ def _candidate_binaries() -> list[Path]:
 
 
 def _is_executable(path: Path) -> bool:
-    return path.exists() and os.access(path, os.X_OK)
+    return os.access(path, os.X_OK)
 
 
-def _binary_is_fresh(path: Path) -> bool:
+def _newest_source_mtime() -> float:
+    newest = 0.0
+    for source in (PLUGIN_ROOT / "src-rs" / "main.rs", PLUGIN_ROOT / "Cargo.toml"):
+        try:
+            newest = max(newest, source.stat().st_mtime)
+        except OSError:
+            continue
+    return newest
+
+
+def _binary_is_fresh(path: Path, source_mtime: float) -> bool:
     try:
-        binary_mtime = path.stat().st_mtime
+        return path.stat().st_mtime >= source_mtime
     except OSError:
         return False
 
-    source_paths = [
-        PLUGIN_ROOT / "src-rs" / "main.rs",
-        PLUGIN_ROOT / "Cargo.toml",
-    ]
-    for source in source_paths:
-        try:
-            if source.exists() and source.stat().st_mtime > binary_mtime:
-                return False
-        except OSError:
-            return False
-    return True
-
 
 def _resolve_rust_binary() -> list[str] | None:
     env_path = os.environ.get(ENV_BIN)
+    source_mtime = _newest_source_mtime()
+
     if env_path:
         env_bin = Path(env_path).expanduser()
-        if _is_executable(env_bin) and _binary_is_fresh(env_bin):
+        if _is_executable(env_bin) and _binary_is_fresh(env_bin, source_mtime):
             return [str(env_bin)]
 
     for candidate in _candidate_binaries():
-        if _is_executable(candidate) and _binary_is_fresh(candidate):
+        if _is_executable(candidate) and _binary_is_fresh(candidate, source_mtime):
             return [str(candidate)]
 
     return None
 
 
-def _run_rust(argv: list[str]) -> int:
+def _rust_command(argv: list[str]) -> list[str] | None:
     binary = _resolve_rust_binary()
     if binary is not None:
-        cmd = [*binary, *argv]
-    else:
-        if not shutil.which("cargo"):
-            print(
-                "error: Rust binary not found and cargo is unavailable. "
-                f"Set {ENV_BIN} or build with `cargo build --manifest-path {MANIFEST_PATH}`.",
-                file=sys.stderr,
-            )
-            return 2
-        cmd = [
-            "cargo",
-            "run",
-            "--quiet",
-            "--manifest-path",
-            str(MANIFEST_PATH),
-            "--",
-            *argv,
-        ]
+        return [*binary, *argv]
+
+    if not shutil.which("cargo"):
+        print(
+            "error: Rust binary not found and cargo is unavailable. "
+            f"Set {ENV_BIN} or build with `cargo build --manifest-path {MANIFEST_PATH}`.",
+            file=sys.stderr,
+        )
+        return None
+    return [
+        "cargo",
+        "run",
+        "--quiet",
+        "--manifest-path",
+        str(MANIFEST_PATH),
+        "--",
+        *argv,
+    ]
+
+
+def _run_rust(argv: list[str]) -> int:
+    cmd = _rust_command(argv)
+    if cmd is None:
+        return 2
 
     proc = subprocess.run(cmd)
     return int(proc.returncode)
 
 
+def _load_feedback_module():
+    try:
+        from . import visual_loop_feedback
+    except ImportError:
+        sys.path.insert(0, str(PLUGIN_ROOT / "src"))
+        from codex_visual_loop_plugin import visual_loop_feedback
+
+    return visual_loop_feedback
+
+
+def _run_help_bundle(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="codex-visual-loop help-bundle",
+        description="Print --help text for several commands as one JSON object keyed by command name.",
+    )
+    parser.add_argument(
+        "--names",
+        help="Comma-separated command names (default: every command)",
+    )
+    args = parser.parse_args(argv)
+    names = [name.strip() for name in (args.names or "").split(",") if name.strip()]
+
+    # Python-side commands are formatted from their own parsers first, so they
+    # are still printed when the Rust backend is missing or fails.
+    bundle: dict[str, str] = {}
+    for name in PYTHON_COMMANDS:
+        if not names or name in names:
+            bundle[name] = _load_feedback_module().build_parser().format_help()
+
+    rc = 0
+    rust_names = [name for name in names if name not in PYTHON_COMMANDS]
+    if rust_names or not names:
+        rust_argv = ["help-bundle"]
+        if rust_names:
+            rust_argv += ["--names", ",".join(rust_names)]
+        cmd = _rust_command(rust_argv)
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True) if cmd is not None else None
+        if proc is None:
+            rc = 2
+        elif proc.returncode != 0:
+            rc = int(proc.returncode)
+        else:
+            bundle.update(json.loads(proc.stdout))
+
+    print(json.dumps({name: bundle[name] for name in names if name in bundle} if names else bundle))
+    return rc
+
+
 def main(argv: list[str] | None = None) -> int:
     args = list(sys.argv[1:] if argv is None else argv)
 
     if args and args[0] == "visual-loop-feedback":
-        try:
-            from .visual_loop_feedback import main as feedback_main
-        except ImportError:
-            sys.path.insert(0, str(PLUGIN_ROOT / "src"))
-            from codex_visual_loop_plugin.visual_loop_feedback import main as feedback_main
-
-        return int(feedback_main(args[1:]))
+        return int(_load_feedback_module().main(args[1:]))
+    if args and args[0] == "help-bundle":
+        return _run_help_bundle(args[1:])
 
     return _run_rust(args)
 
@@ -9,7 +9,7 @@ import shutil
 import subprocess
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
 from . import cli as rust_cli
 
@@ -97,9 +97,35 @@ def _resolve_inbox_path(
     ).resolve()
 
 
-def _extract_first(text: str, patterns: List[str]) -> Optional[str]:
+def _compile_patterns(*patterns: str) -> Tuple[Pattern[str], ...]:
+    return tuple(re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in patterns)
+
+
+_PROCESS_PATTERNS = _compile_patterns(
+    r"--process\s+\"([^\"]+)\"",
+    r"--process\s+'([^']+)'",
+    r"process\s+\"([^\"]+)\"",
+    r"process\s+'([^']+)'",
+    r"app\s+\"([^\"]+)\"",
+    r"app\s+'([^']+)'",
+)
+
+_ACTION_PATTERNS = _compile_patterns(
+    r"--action\s+\"([^\"]+)\"",
+    r"--action\s+'([^']+)'",
+    r"action\s+\"([^\"]+)\"",
+    r"action\s+'([^']+)'",
+)
+
+_ACTION_CMD_PATTERNS = _compile_patterns(
+    r"--action-cmd\s+\"([^\"]+)\"",
+    r"--action-cmd\s+'([^']+)'",
+)
+
+
+def _extract_first(text: str, patterns: Tuple[Pattern[str], ...]) -> Optional[str]:
     for pattern in patterns:
-        match = re.search(pattern, text, flags=re.IGNORECASE | re.MULTILINE)
+        match = pattern.search(text)
         if match:
             value = (match.group(1) or "").strip()
             if value:
@@ -108,39 +134,15 @@ def _extract_first(text: str, patterns: List[str]) -> Optional[str]:
 
 
 def _infer_process(text: str) -> Optional[str]:
-    return _extract_first(
-        text,
-        [
-            r"--process\s+\"([^\"]+)\"",
-            r"--process\s+'([^']+)'",
-            r"process\s+\"([^\"]+)\"",
-            r"process\s+'([^']+)'",
-            r"app\s+\"([^\"]+)\"",
-            r"app\s+'([^']+)'",
-        ],
-    )
+    return _extract_first(text, _PROCESS_PATTERNS)
 
 
 def _infer_action(text: str) -> Optional[str]:
-    return _extract_first(
-        text,
-        [
-            r"--action\s+\"([^\"]+)\"",
-            r"--action\s+'([^']+)'",
-            r"action\s+\"([^\"]+)\"",
-            r"action\s+'([^']+)'",
-        ],
-    )
+    return _extract_first(text, _ACTION_PATTERNS)
 
 
 def _infer_action_cmd(text: str) -> Optional[str]:
-    return _extract_first(
-        text,
-        [
-            r"--action-cmd\s+\"([^\"]+)\"",
-            r"--action-cmd\s+'([^']+)'",
-        ],
-    )
+    return _extract_first(text, _ACTION_CMD_PATTERNS)
 
 
 def _parse_actions(raw_actions: str) -> List[str]:
@@ -283,7 +285,7 @@ def _build_plan(
     }
 
 
-def run(argv: Optional[List[str]] = None) -> int:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="codex-visual-loop visual-loop-feedback",
         description=(
@@ -318,8 +320,11 @@ def run(argv: Optional[List[str]] = None) -> int:
     )
     parser.add_argument("--execute", action="store_true", help="Execute planned codex-visual-loop commands.")
     parser.add_argument("--json", action="store_true", help="Emit JSON payload.")
+    return parser
+
 
-    args = parser.parse_args(argv)
+def run(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
 
     worker_env = os.environ.get("OMX_TEAM_WORKER")
     team_name, worker_name = _parse_worker_identity(worker_env)
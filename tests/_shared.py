@@ -0,0 +1,84 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Rect-only annotate spec exercised by both the plugin CLI and the
+# standalone annotate_image.py script.
+SPEC_RECT_BYTES = json.dumps(
+    {
+        "defaults": {"units": "rel", "auto_fit": False},
+        "annotations": [
+            {
+                "type": "rect",
+                "id": "cta",
+                "x": 0.1,
+                "y": 0.2,
+                "w": 0.5,
+                "h": 0.4,
+                "severity": "high",
+                "issue": "Button not centered",
+                "hypothesis": "Wrong spacing token",
+                "next_action": "Adjust margin",
+                "verify": "Center aligned",
+                "color": "#FF453A",
+            }
+        ],
+    }
+).encode("utf-8")
+
+
+# Both parsers accept bytes, so captured CLI output needs no decode step.
+loads = orjson.loads if orjson is not None else json.loads
+
+
+def read_json(path: Path):
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with path.open("rb") as f:
+        return json.load(f)
+
+
+class TmpDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmp = Path(tempfile.mkdtemp(prefix="cvl_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        super().tearDown()
+
+
+class VisualLoopAssertionsMixin:
+    def assert_rect_geometry(self, meta: dict) -> None:
+        # SPEC_RECT_BYTES on a 200x100 canvas.
+        rect = next(item for item in meta["annotations"] if item.get("id") == "cta")
+        geom = rect["geometry"]
+        self.assertAlmostEqual(geom["x"], 20, delta=1)
+        self.assertAlmostEqual(geom["y"], 20, delta=1)
+        self.assertAlmostEqual(geom["w"], 100, delta=1)
+        self.assertAlmostEqual(geom["h"], 40, delta=1)
+        self.assertEqual(rect["severity"], "high")
+        self.assertEqual(rect["issue"], "Button not centered")
+        self.assertEqual(rect["hypothesis"], "Wrong spacing token")
+        self.assertEqual(rect["next_action"], "Adjust margin")
+        self.assertEqual(rect["verify"], "Center aligned")
+
+    def assert_change_regions(self, payload: dict, spec_payload: dict) -> None:
+        # rect_png(120, 80, 20, 15, 55, 45) against a white 120x80 baseline.
+        self.assertGreaterEqual(payload["change_region_count"], 1)
+        first = payload["change_regions"][0]
+        self.assertLessEqual(first["x"], 20)
+        self.assertLessEqual(first["y"], 15)
+        self.assertGreaterEqual(first["w"], 30)
+        self.assertGreaterEqual(first["h"], 25)
+
+        types = [item["type"] for item in spec_payload["annotations"]]
+        self.assertIn("rect", types)
+        self.assertIn("text", types)
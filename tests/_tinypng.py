@@ -0,0 +1,36 @@
+import functools
+import struct
+import zlib
+
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_WHITE = b"\xff\xff\xff"
+_BLACK = b"\x00\x00\x00"
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _encode(width: int, height: int, rows: list[bytes]) -> bytes:
+    # 8-bit truecolor, filter type 0 per scanline, stored (level 0) deflate.
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    raw = b"".join(b"\x00" + row for row in rows)
+    return (
+        _SIGNATURE
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(raw, 0))
+        + _chunk(b"IEND", b"")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def white_png(width: int, height: int) -> bytes:
+    return _encode(width, height, [_WHITE * width] * height)
+
+
+@functools.lru_cache(maxsize=None)
+def rect_png(width: int, height: int, x0: int, y0: int, x1: int, y1: int) -> bytes:
+    # Corners are inclusive, matching ImageDraw.rectangle([x0, y0, x1, y1]).
+    blank = _WHITE * width
+    filled = _WHITE * x0 + _BLACK * (x1 - x0 + 1) + _WHITE * (width - x1 - 1)
+    return _encode(width, height, [filled if y0 <= y <= y1 else blank for y in range(height)])
@@ -0,0 +1,15 @@
+import pytest
+
+from run_tests import SERIAL_TESTS
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "serial: run on a single worker after the parallel cases")
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        if item.name in SERIAL_TESTS:
+            item.add_marker(pytest.mark.serial)
+            item.add_marker(pytest.mark.xdist_group("serial"))
+    items.sort(key=lambda item: item.get_closest_marker("serial") is not None)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+TESTS_DIR = Path(__file__).resolve().parent
+# Cases with a wall-clock floor; they would skew parallel workers, so they run
+# on their own after everything else (conftest.py applies the same split).
+SERIAL_TESTS = frozenset({"test_observe_duration_three_waits_scaled_duration"})
+
+
+def _iter_test_ids(suite: unittest.TestSuite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_test_ids(test)
+        else:
+            yield test.id()
+
+
+def _run_chunk(test_ids: list[str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "-m", "unittest", *test_ids],
+        cwd=TESTS_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the unittest suite across parallel worker processes.")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker count (default: CPU count)")
+    parser.add_argument("-p", "--pattern", default="test_*.py", help="Test module glob (default: test_*.py)")
+    args = parser.parse_args(argv)
+
+    suite = unittest.TestLoader().discover(str(TESTS_DIR), pattern=args.pattern, top_level_dir=str(TESTS_DIR))
+    test_ids = list(_iter_test_ids(suite))
+    serial = [test_id for test_id in test_ids if test_id.rsplit(".", 1)[-1] in SERIAL_TESTS]
+    parallel = [test_id for test_id in test_ids if test_id not in serial]
+
+    # Each worker gets one interpreter for a round-robin slice of the cases;
+    # the workers only wait on children, so threads are enough to fan out.
+    jobs = max(1, min(args.jobs, len(parallel)))
+    chunks = [parallel[idx::jobs] for idx in range(jobs) if parallel[idx::jobs]]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(_run_chunk, chunks))
+    if serial:
+        results.append(_run_chunk(serial))
+
+    failed = 0
+    for proc in results:
+        if proc.returncode != 0:
+            failed += 1
+            sys.stderr.write(proc.stderr)
+    print(f"ran {len(test_ids)} test(s) in {len(results)} worker run(s); {failed} run(s) failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,7 @@
+import contextlib
+import functools
+import importlib
+import io
 import json
 import os
 import subprocess
@@ -6,8 +10,11 @@ import tempfile
 import time
 import unittest
 from pathlib import Path
+from unittest import mock
 
-from PIL import Image, ImageDraw
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _shared import SPEC_RECT_BYTES, TmpDirMixin, VisualLoopAssertionsMixin, loads, read_json  # noqa: E402
+from _tinypng import rect_png, white_png  # noqa: E402
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -15,6 +22,114 @@ PLUGIN_ROOT = ROOT / "codex-visual-loop-plugin"
 CLI = PLUGIN_ROOT / "src" / "codex_visual_loop_plugin" / "cli.py"
 SKILL_PATH = ROOT / "skills" / "codex-visual-loop" / "SKILL.md"
 
+_SPEC_COMPLEX_BYTES = json.dumps(
+    {
+        "defaults": {
+            "units": "rel",
+            "auto_fit": True,
+            "anchor_pos": "center",
+            "anchor_offset": [0, -0.05],
+        },
+        "annotations": [
+            {"type": "rect", "id": "cta", "x": 0.25, "y": 0.3, "w": 0.3, "h": 0.25},
+            {"type": "spotlight", "id": "hero", "x": 0.55, "y": 0.15, "w": 0.35, "h": 0.55},
+            {"type": "arrow", "from": "cta", "to": "hero", "x1": 0.25, "y1": 0.45, "x2": 0.55, "y2": 0.2},
+            {
+                "type": "text",
+                "id": "cta-label",
+                "x": 0.25,
+                "y": 0.2,
+                "text": "Primary CTA",
+                "anchor": "cta",
+            },
+        ],
+    }
+).encode("utf-8")
+
+
+_MANIFEST = read_json(PLUGIN_ROOT / "manifest.json")
+_SKILL_TEXT_LOWER = SKILL_PATH.read_text(encoding="utf-8").lower()
+_REQUIRED_COMMANDS = frozenset(
+    {
+        "capture",
+        "annotate",
+        "diff",
+        "loop",
+        "observe",
+        "ax-tree",
+        "act",
+        "explain-app",
+        "visual-loop-feedback",
+    }
+)
+# visual-loop-feedback is served by the Python wrapper, not the Rust command list.
+_RUST_COMMANDS = _REQUIRED_COMMANDS - {"visual-loop-feedback"}
+
+
+# CODEX_TESTS_INPROC=1 dispatches run_cli through the imported CLI entrypoint
+# instead of spawning a fresh interpreter per call.
+INPROC = os.environ.get("CODEX_TESTS_INPROC") == "1"
+sys.path.insert(0, str(PLUGIN_ROOT / "src"))
+_CLI_MODULE = importlib.import_module("codex_visual_loop_plugin.cli")
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _run_cli_inproc(
+    args: tuple[str, ...],
+    cwd: Path,
+    env_updates: dict[str, str] | None,
+    unset_env: tuple[str, ...],
+    check: bool,
+    capture_stdout: bool,
+) -> subprocess.CompletedProcess[bytes]:
+    out_buf = io.StringIO()
+    err_buf = io.StringIO()
+    prev_cwd = os.getcwd()
+    # The Rust backend runs as a child that inherits fds 1/2, so those are
+    # redirected to temp files alongside the Python-level stdout/stderr.
+    with tempfile.TemporaryFile() as out_file, tempfile.TemporaryFile() as err_file, mock.patch.dict(
+        os.environ, env_updates or {}
+    ):
+        for key in unset_env:
+            os.environ.pop(key, None)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_fds = (os.dup(1), os.dup(2))
+        os.dup2(out_file.fileno(), 1)
+        os.dup2(err_file.fileno(), 2)
+        os.chdir(cwd)
+        try:
+            with contextlib.redirect_stdout(out_buf), contextlib.redirect_stderr(err_buf):
+                try:
+                    returncode = int(_CLI_MODULE.main(list(args)) or 0)
+                except SystemExit as exc:
+                    returncode = _exit_code(exc)
+        finally:
+            os.chdir(prev_cwd)
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+
+        out_file.seek(0)
+        err_file.seek(0)
+        stdout = out_buf.getvalue().encode("utf-8") + out_file.read() if capture_stdout else None
+        stderr = err_buf.getvalue().encode("utf-8") + err_file.read()
+
+    cmd = [sys.executable, str(CLI), *args]
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
 
 def run_cli(
     *args: str,
@@ -22,413 +137,314 @@ def run_cli(
     env_updates: dict[str, str] | None = None,
     unset_env: tuple[str, ...] = (),
     check: bool = True,
-) -> subprocess.CompletedProcess[str]:
-    env = os.environ.copy()
-    for key in unset_env:
-        env.pop(key, None)
-    if env_updates:
-        env.update(env_updates)
+    capture_stdout: bool = True,
+) -> subprocess.CompletedProcess[bytes]:
+    if INPROC:
+        return _run_cli_inproc(args, cwd, env_updates, unset_env, check, capture_stdout)
+
+    # env=None inherits the parent environment without building a copy.
+    env = None
+    if env_updates or unset_env:
+        env = os.environ.copy()
+        for key in unset_env:
+            env.pop(key, None)
+        env.update(env_updates or {})
 
     return subprocess.run(
         [sys.executable, str(CLI), *args],
         cwd=cwd,
         check=check,
-        capture_output=True,
-        text=True,
+        stdout=subprocess.PIPE if capture_stdout else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         env=env,
     )
 
 
-class CodexVisualLoopPluginTests(unittest.TestCase):
+@functools.lru_cache(maxsize=None)
+def help_bundle(names: str = "capture,observe,ax-tree,act") -> dict[str, str]:
+    proc = run_cli("help-bundle", "--names", names)
+    return loads(proc.stdout)
+
+
+def setUpModule():
+    # One throwaway call warms an already-built Rust binary before the timed
+    # cases run. Without one it would start a cargo build, so it is skipped.
+    if _CLI_MODULE._resolve_rust_binary() is not None:
+        run_cli("commands", check=False)
+
+
+class CodexVisualLoopPluginTests(TmpDirMixin, VisualLoopAssertionsMixin, unittest.TestCase):
     def test_manifest_declares_required_features_and_commands(self):
-        manifest = json.loads((PLUGIN_ROOT / "manifest.json").read_text(encoding="utf-8"))
-        features = " ".join(manifest.get("features", []))
+        features = " ".join(_MANIFEST.get("features", []))
         self.assertIn("metadata", features.lower())
         self.assertIn("semantic", features.lower())
         self.assertIn("diff-to-bbox", features.lower())
         self.assertIn("observation packet", features.lower())
         self.assertIn("ax tree", features.lower())
 
-        names = [item["name"] for item in manifest.get("commands", [])]
-        for required in (
-            "capture",
-            "annotate",
-            "diff",
-            "loop",
-            "observe",
-            "ax-tree",
-            "act",
-            "explain-app",
-            "visual-loop-feedback",
-        ):
-            self.assertIn(required, names)
+        names = {item["name"] for item in _MANIFEST.get("commands", [])}
+        self.assertSetEqual(_REQUIRED_COMMANDS & names, _REQUIRED_COMMANDS)
 
     def test_cli_lists_commands(self):
         proc = run_cli("commands")
-        payload = json.loads(proc.stdout)
-        names = [item["name"] for item in payload["commands"]]
-        self.assertIn("capture", names)
-        self.assertIn("diff", names)
-        self.assertIn("observe", names)
-        self.assertIn("ax-tree", names)
-        self.assertIn("act", names)
-        self.assertIn("explain-app", names)
+        payload = loads(proc.stdout)
+        names = {item["name"] for item in payload["commands"]}
+        self.assertSetEqual(_RUST_COMMANDS & names, _RUST_COMMANDS)
         for item in payload["commands"]:
             self.assertEqual(item.get("runner"), "rust")
 
     def test_skill_wrapper_mentions_required_commands(self):
-        text = SKILL_PATH.read_text(encoding="utf-8").lower()
-        self.assertIn("codex-visual-loop", text)
-        for command in (
-            "capture",
-            "annotate",
-            "diff",
-            "loop",
-            "observe",
-            "ax-tree",
-            "act",
-            "explain-app",
-            "visual-loop-feedback",
-        ):
-            self.assertIn(command, text)
+        self.assertIn("codex-visual-loop", _SKILL_TEXT_LOWER)
+        mentioned = {command for command in _REQUIRED_COMMANDS if command in _SKILL_TEXT_LOWER}
+        self.assertSetEqual(mentioned, _REQUIRED_COMMANDS)
 
     def test_capture_help_mentions_json_sidecar_flags(self):
-        proc = run_cli("capture", "--help")
-        stdout = proc.stdout.lower()
+        stdout = help_bundle()["capture"].lower()
         self.assertIn("--json", stdout)
         self.assertIn("--sidecar", stdout)
         self.assertIn("--strict", stdout)
         self.assertIn("metadata", stdout)
 
     def test_capture_json_includes_capture_mode_and_fallback_fields(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out = Path(tmpdir) / "capture.png"
-            proc = run_cli("capture", str(out), "--json", "--no-sidecar")
-            payload = json.loads(proc.stdout)
-            self.assertIn(payload.get("capture_mode"), {"window", "screen", "fallback"})
-            self.assertIsInstance(payload.get("fallback_used"), bool)
-            self.assertIsInstance(payload.get("warnings"), list)
-            probe = payload.get("window_probe")
-            self.assertIsInstance(probe, dict)
-            self.assertIn("selection_mode", probe)
-            self.assertIn("candidate_count", probe)
-            self.assertIn("usable", probe)
+        out = self.tmp / "capture.png"
+        proc = run_cli("capture", str(out), "--json", "--no-sidecar")
+        payload = loads(proc.stdout)
+        self.assertIn(payload.get("capture_mode"), {"window", "screen", "fallback"})
+        self.assertIsInstance(payload.get("fallback_used"), bool)
+        self.assertIsInstance(payload.get("warnings"), list)
+        probe = payload.get("window_probe")
+        self.assertIsInstance(probe, dict)
+        self.assertIn("selection_mode", probe)
+        self.assertIn("candidate_count", probe)
+        self.assertIn("usable", probe)
 
     def test_capture_strict_surfaces_explicit_failure_mode(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            out = Path(tmpdir) / "strict-capture.png"
-            proc = run_cli(
-                "capture",
-                str(out),
-                "--json",
-                "--no-sidecar",
-                "--strict",
-                check=False,
-                env_updates={"PATH": "/usr/bin"},
-            )
-
-            self.assertNotEqual(proc.returncode, 0)
-            payload = json.loads(proc.stdout)
-            self.assertTrue(payload.get("fallback_used"))
-            self.assertEqual(payload.get("capture_mode"), "fallback")
-            warning_text = " ".join(payload.get("warnings", [])).lower()
-            self.assertIn("capture failed", warning_text)
-            self.assertIn("placeholder output", proc.stderr.lower())
+        out = self.tmp / "strict-capture.png"
+        proc = run_cli(
+            "capture",
+            str(out),
+            "--json",
+            "--no-sidecar",
+            "--strict",
+            check=False,
+            env_updates={"PATH": "/usr/bin"},
+        )
+
+        self.assertNotEqual(proc.returncode, 0)
+        payload = loads(proc.stdout)
+        self.assertTrue(payload.get("fallback_used"))
+        self.assertEqual(payload.get("capture_mode"), "fallback")
+        warning_text = " ".join(payload.get("warnings", [])).lower()
+        self.assertIn("capture failed", warning_text)
+        self.assertIn(b"placeholder output", proc.stderr.lower())
 
     def test_annotate_rel_units_and_semantic_fields(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            input_path = tmp / "input.png"
-            output_path = tmp / "output.png"
-            spec_path = tmp / "spec.json"
-
-            Image.new("RGB", (200, 100), (255, 255, 255)).save(input_path)
-            spec = {
-                "defaults": {"units": "rel", "auto_fit": False},
-                "annotations": [
-                    {
-                        "type": "rect",
-                        "id": "cta",
-                        "x": 0.1,
-                        "y": 0.2,
-                        "w": 0.5,
-                        "h": 0.4,
-                        "severity": "high",
-                        "issue": "Button not centered",
-                        "hypothesis": "Wrong spacing token",
-                        "next_action": "Adjust margin",
-                        "verify": "Center aligned",
-                        "color": "#FF453A",
-                    }
-                ],
-            }
-            spec_path.write_text(json.dumps(spec), encoding="utf-8")
-
-            run_cli("annotate", str(input_path), str(output_path), "--spec", str(spec_path))
-
-            meta_path = output_path.with_suffix(".json")
-            self.assertTrue(output_path.exists())
-            self.assertTrue(meta_path.exists())
-
-            meta = json.loads(meta_path.read_text(encoding="utf-8"))
-            rect = next(item for item in meta["annotations"] if item.get("id") == "cta")
-            geom = rect["geometry"]
-            self.assertAlmostEqual(geom["x"], 20, delta=1)
-            self.assertAlmostEqual(geom["y"], 20, delta=1)
-            self.assertAlmostEqual(geom["w"], 100, delta=1)
-            self.assertAlmostEqual(geom["h"], 40, delta=1)
-            self.assertEqual(rect["severity"], "high")
-            self.assertEqual(rect["issue"], "Button not centered")
-            self.assertEqual(rect["hypothesis"], "Wrong spacing token")
-            self.assertEqual(rect["next_action"], "Adjust margin")
-            self.assertEqual(rect["verify"], "Center aligned")
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            input_path = tmp / "input.png"
-            output_path = tmp / "output.png"
-            spec_path = tmp / "spec.json"
-
-            Image.new("RGB", (240, 120), (255, 255, 255)).save(input_path)
-            spec = {
-                "defaults": {
-                    "units": "rel",
-                    "auto_fit": True,
-                    "anchor_pos": "center",
-                    "anchor_offset": [0, -0.05],
-                },
-                "annotations": [
-                    {"type": "rect", "id": "cta", "x": 0.25, "y": 0.3, "w": 0.3, "h": 0.25},
-                    {"type": "spotlight", "id": "hero", "x": 0.55, "y": 0.15, "w": 0.35, "h": 0.55},
-                    {"type": "arrow", "from": "cta", "to": "hero", "x1": 0.25, "y1": 0.45, "x2": 0.55, "y2": 0.2},
-                    {
-                        "type": "text",
-                        "id": "cta-label",
-                        "x": 0.25,
-                        "y": 0.2,
-                        "text": "Primary CTA",
-                        "anchor": "cta",
-                    },
-                ],
-            }
-            spec_path.write_text(json.dumps(spec), encoding="utf-8")
-
-            run_cli("annotate", str(input_path), str(output_path), "--spec", str(spec_path))
-
-            meta = json.loads(output_path.with_suffix(".json").read_text(encoding="utf-8"))
-            self.assertEqual(meta["defaults"]["auto_fit"], True)
-            self.assertEqual(meta["defaults"]["anchor_pos"], "center")
-
-            types = [item["type"] for item in meta["annotations"]]
-            self.assertEqual(types, ["rect", "spotlight", "arrow", "text"])
-
-            spotlight = next(item for item in meta["annotations"] if item["type"] == "spotlight")
-            self.assertIn("bbox", spotlight["geometry_rel"])
-
-            arrow = next(item for item in meta["annotations"] if item["type"] == "arrow")
-            self.assertAlmostEqual(arrow["geometry"]["x1"], 96, delta=1)
-            self.assertAlmostEqual(arrow["geometry"]["x2"], 174, delta=1)
-
-            text = next(item for item in meta["annotations"] if item["type"] == "text")
-            self.assertEqual(text.get("text"), "Primary CTA")
+        input_path = self.tmp / "input.png"
+        output_path = self.tmp / "output.png"
+        spec_path = self.tmp / "spec.json"
+
+        input_path.write_bytes(white_png(200, 100))
+        spec_path.write_bytes(SPEC_RECT_BYTES)
+
+        run_cli("annotate", str(input_path), str(output_path), "--spec", str(spec_path), capture_stdout=False)
+
+        meta_path = output_path.with_suffix(".json")
+        self.assertTrue(output_path.exists())
+        self.assertTrue(meta_path.exists())
+
+        self.assert_rect_geometry(read_json(meta_path))
+
+        input_path.write_bytes(white_png(240, 120))
+        spec_path.write_bytes(_SPEC_COMPLEX_BYTES)
+
+        run_cli("annotate", str(input_path), str(output_path), "--spec", str(spec_path), capture_stdout=False)
+
+        meta = read_json(output_path.with_suffix(".json"))
+        self.assertEqual(meta["defaults"]["auto_fit"], True)
+        self.assertEqual(meta["defaults"]["anchor_pos"], "center")
+
+        types = [item["type"] for item in meta["annotations"]]
+        self.assertEqual(types, ["rect", "spotlight", "arrow", "text"])
+
+        spotlight = next(item for item in meta["annotations"] if item["type"] == "spotlight")
+        self.assertIn("bbox", spotlight["geometry_rel"])
+
+        arrow = next(item for item in meta["annotations"] if item["type"] == "arrow")
+        self.assertAlmostEqual(arrow["geometry"]["x1"], 96, delta=1)
+        self.assertAlmostEqual(arrow["geometry"]["x2"], 174, delta=1)
+
+        text = next(item for item in meta["annotations"] if item["type"] == "text")
+        self.assertEqual(text.get("text"), "Primary CTA")
 
     def test_compare_images_emits_change_regions_and_spec(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            baseline = tmp / "baseline.png"
-            current = tmp / "current.png"
-            report = tmp / "report.json"
-            spec = tmp / "change-spec.json"
-
-            Image.new("RGB", (120, 80), (255, 255, 255)).save(baseline)
-            image = Image.new("RGB", (120, 80), (255, 255, 255))
-            draw = ImageDraw.Draw(image)
-            draw.rectangle([20, 15, 55, 45], fill=(0, 0, 0))
-            image.save(current)
-
-            run_cli(
-                "diff",
-                str(baseline),
-                str(current),
-                "--json-out",
-                str(report),
-                "--annotate-spec-out",
-                str(spec),
-                "--bbox-threshold",
-                "1",
-                "--bbox-min-area",
-                "10",
-            )
-
-            payload = json.loads(report.read_text(encoding="utf-8"))
-            self.assertGreaterEqual(payload["change_region_count"], 1)
-            first = payload["change_regions"][0]
-            self.assertLessEqual(first["x"], 20)
-            self.assertLessEqual(first["y"], 15)
-            self.assertGreaterEqual(first["w"], 30)
-            self.assertGreaterEqual(first["h"], 25)
-
-            spec_payload = json.loads(spec.read_text(encoding="utf-8"))
-            types = [item["type"] for item in spec_payload["annotations"]]
-            self.assertIn("rect", types)
-            self.assertIn("text", types)
+        baseline = self.tmp / "baseline.png"
+        current = self.tmp / "current.png"
+        report = self.tmp / "report.json"
+        spec = self.tmp / "change-spec.json"
+
+        baseline.write_bytes(white_png(120, 80))
+        current.write_bytes(rect_png(120, 80, 20, 15, 55, 45))
+
+        run_cli(
+            "diff",
+            str(baseline),
+            str(current),
+            "--json-out",
+            str(report),
+            "--annotate-spec-out",
+            str(spec),
+            "--bbox-threshold",
+            "1",
+            "--bbox-min-area",
+            "10",
+            capture_stdout=False,
+        )
+
+        self.assert_change_regions(read_json(report), read_json(spec))
 
     def test_loop_compare_generates_diff_annotated_artifact(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            img1 = tmp / "a.png"
-            img2 = tmp / "b.png"
-            loop_dir = tmp / "loop"
-
-            Image.new("RGB", (100, 60), (255, 255, 255)).save(img1)
-            img = Image.new("RGB", (100, 60), (255, 255, 255))
-            draw = ImageDraw.Draw(img)
-            draw.rectangle([10, 10, 40, 30], fill=(0, 0, 0))
-            img.save(img2)
-
-            run_cli("loop", "--loop-dir", str(loop_dir), str(img1), "home")
-            run_cli(
-                "loop",
-                "--loop-dir",
-                str(loop_dir),
-                "--bbox-threshold",
-                "1",
-                "--bbox-min-area",
-                "10",
-                str(img2),
-                "home",
-            )
-
-            annotations_dir = loop_dir / "annotations"
-            reports_dir = loop_dir / "reports"
-            self.assertTrue(any(annotations_dir.glob("home-*.png")))
-            self.assertTrue(any(reports_dir.glob("home-*-change-spec.json")))
+        img1 = self.tmp / "a.png"
+        img2 = self.tmp / "b.png"
+        loop_dir = self.tmp / "loop"
+
+        img1.write_bytes(white_png(100, 60))
+        img2.write_bytes(rect_png(100, 60, 10, 10, 40, 30))
+
+        # Seed the baseline through the positional form, then compare via --batch
+        # so both argument shapes of `loop` are exercised.
+        run_cli("loop", "--loop-dir", str(loop_dir), str(img1), "home", capture_stdout=False)
+
+        batch = self.tmp / "batch.json"
+        batch.write_text(
+            json.dumps([{"image": str(img2), "label": "home", "bbox_threshold": 1, "bbox_min_area": 10}]),
+            encoding="utf-8",
+        )
+
+        run_cli("loop", "--loop-dir", str(loop_dir), "--batch", str(batch), capture_stdout=False)
+
+        annotations_dir = loop_dir / "annotations"
+        reports_dir = loop_dir / "reports"
+        self.assertTrue(any(annotations_dir.glob("home-*.png")))
+        self.assertTrue(any(reports_dir.glob("home-*-change-spec.json")))
 
     def test_visual_loop_feedback_plans_actions_from_worker_inbox(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            state_root = tmp / ".omx" / "state"
-            inbox = (
-                state_root
-                / "team"
-                / "demo"
-                / "workers"
-                / "worker-2"
-                / "inbox.md"
-            )
-            inbox.parent.mkdir(parents=True, exist_ok=True)
-            inbox.write_text(
-                """
+        state_root = self.tmp / ".omx" / "state"
+        inbox = (
+            state_root
+            / "team"
+            / "demo"
+            / "workers"
+            / "worker-2"
+            / "inbox.md"
+        )
+        inbox.parent.mkdir(parents=True, exist_ok=True)
+        inbox.write_text(
+            """
 Worker instruction: use codex-visual-loop capture --process "Finder" --json first.
 Then validate with codex-visual-loop observe --action "open-settings" --action-cmd 'echo click'.
 """.strip(),
-                encoding="utf-8",
-            )
-
-            proc = run_cli(
-                "visual-loop-feedback",
-                "--json",
-                env_updates={
-                    "OMX_TEAM_WORKER": "demo/worker-2",
-                    "OMX_TEAM_STATE_ROOT": str(state_root),
-                },
-            )
-
-            payload = json.loads(proc.stdout)
-            self.assertEqual(payload["mode"], "dry_run")
-            self.assertEqual(payload["team_name"], "demo")
-            self.assertEqual(payload["worker_name"], "worker-2")
-            self.assertEqual(payload["inbox_path"], str(inbox.resolve()))
-
-            command_names = [item["name"] for item in payload["plan"]["commands"]]
-            self.assertEqual(command_names, ["capture", "ax-tree", "observe"])
-
-            observe_argv = payload["plan"]["commands"][2]["argv"]
-            self.assertIn("--action", observe_argv)
-            self.assertNotIn("--action-cmd", observe_argv)
-            self.assertTrue(payload["plan"]["warnings"])
+            encoding="utf-8",
+        )
+
+        proc = run_cli(
+            "visual-loop-feedback",
+            "--json",
+            env_updates={
+                "OMX_TEAM_WORKER": "demo/worker-2",
+                "OMX_TEAM_STATE_ROOT": str(state_root),
+            },
+        )
+
+        payload = loads(proc.stdout)
+        self.assertEqual(payload["mode"], "dry_run")
+        self.assertEqual(payload["team_name"], "demo")
+        self.assertEqual(payload["worker_name"], "worker-2")
+        self.assertEqual(payload["inbox_path"], str(inbox.resolve()))
+
+        command_names = [item["name"] for item in payload["plan"]["commands"]]
+        self.assertEqual(command_names, ["capture", "ax-tree", "observe"])
+
+        observe_argv = payload["plan"]["commands"][2]["argv"]
+        self.assertIn("--action", observe_argv)
+        self.assertNotIn("--action-cmd", observe_argv)
+        self.assertTrue(payload["plan"]["warnings"])
 
     def test_visual_loop_feedback_supports_action_subset_for_explain_pipeline(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            state_root = tmp / ".omx" / "state"
-            inbox = (
-                state_root
-                / "team"
-                / "demo"
-                / "workers"
-                / "worker-7"
-                / "inbox.md"
-            )
-            inbox.parent.mkdir(parents=True, exist_ok=True)
-            inbox.write_text(
-                """
+        state_root = self.tmp / ".omx" / "state"
+        inbox = (
+            state_root
+            / "team"
+            / "demo"
+            / "workers"
+            / "worker-7"
+            / "inbox.md"
+        )
+        inbox.parent.mkdir(parents=True, exist_ok=True)
+        inbox.write_text(
+            """
 Please inspect process "Calendar".
 Use action "explain-toolbar-state".
 """.strip(),
-                encoding="utf-8",
-            )
-
-            proc = run_cli(
-                "visual-loop-feedback",
-                "--json",
-                "--actions",
-                "capture,observe",
-                "--observe-duration",
-                "0",
-                env_updates={
-                    "OMX_TEAM_WORKER": "demo/worker-7",
-                    "OMX_TEAM_STATE_ROOT": str(state_root),
-                },
-            )
-
-            payload = json.loads(proc.stdout)
-            commands = payload["plan"]["commands"]
-            self.assertEqual([cmd["name"] for cmd in commands], ["capture", "observe"])
-            observe_argv = commands[1]["argv"]
-            self.assertIn("--duration", observe_argv)
-            self.assertIn("0", observe_argv)
-            self.assertIn("--action", observe_argv)
-            self.assertIn("explain-toolbar-state", observe_argv)
-            self.assertEqual(payload["plan"]["inferred"]["process_name"], "Calendar")
+            encoding="utf-8",
+        )
+
+        proc = run_cli(
+            "visual-loop-feedback",
+            "--json",
+            "--actions",
+            "capture,observe",
+            "--observe-duration",
+            "0",
+            env_updates={
+                "OMX_TEAM_WORKER": "demo/worker-7",
+                "OMX_TEAM_STATE_ROOT": str(state_root),
+            },
+        )
+
+        payload = loads(proc.stdout)
+        commands = payload["plan"]["commands"]
+        self.assertEqual([cmd["name"] for cmd in commands], ["capture", "observe"])
+        observe_argv = commands[1]["argv"]
+        self.assertIn("--duration", observe_argv)
+        self.assertIn("0", observe_argv)
+        self.assertIn("--action", observe_argv)
+        self.assertIn("explain-toolbar-state", observe_argv)
+        self.assertEqual(payload["plan"]["inferred"]["process_name"], "Calendar")
 
     def test_visual_loop_feedback_allows_action_cmd_when_explicitly_enabled(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            state_root = tmp / ".omx" / "state"
-            inbox = (
-                state_root
-                / "team"
-                / "demo"
-                / "workers"
-                / "worker-2"
-                / "inbox.md"
-            )
-            inbox.parent.mkdir(parents=True, exist_ok=True)
-            inbox.write_text(
-                'codex-visual-loop observe --process "Finder" --action "open" --action-cmd "echo click"',
-                encoding="utf-8",
-            )
-
-            proc = run_cli(
-                "visual-loop-feedback",
-                "--json",
-                "--allow-action-cmd",
-                env_updates={
-                    "OMX_TEAM_WORKER": "demo/worker-2",
-                    "OMX_TEAM_STATE_ROOT": str(state_root),
-                },
-            )
-
-            payload = json.loads(proc.stdout)
-            observe_argv = payload["plan"]["commands"][2]["argv"]
-            self.assertIn("--action-cmd", observe_argv)
-            self.assertIn("echo click", observe_argv)
-            self.assertFalse(payload["plan"]["warnings"])
+        state_root = self.tmp / ".omx" / "state"
+        inbox = (
+            state_root
+            / "team"
+            / "demo"
+            / "workers"
+            / "worker-2"
+            / "inbox.md"
+        )
+        inbox.parent.mkdir(parents=True, exist_ok=True)
+        inbox.write_text(
+            'codex-visual-loop observe --process "Finder" --action "open" --action-cmd "echo click"',
+            encoding="utf-8",
+        )
+
+        proc = run_cli(
+            "visual-loop-feedback",
+            "--json",
+            "--allow-action-cmd",
+            env_updates={
+                "OMX_TEAM_WORKER": "demo/worker-2",
+                "OMX_TEAM_STATE_ROOT": str(state_root),
+            },
+        )
+
+        payload = loads(proc.stdout)
+        observe_argv = payload["plan"]["commands"][2]["argv"]
+        self.assertIn("--action-cmd", observe_argv)
+        self.assertIn("echo click", observe_argv)
+        self.assertFalse(payload["plan"]["warnings"])
 
     def test_visual_loop_feedback_help_mentions_safety_flags(self):
-        proc = run_cli("visual-loop-feedback", "--help")
-        stdout = proc.stdout.lower()
+        stdout = help_bundle("visual-loop-feedback")["visual-loop-feedback"].lower()
         self.assertIn("--execute", stdout)
         self.assertIn("--allow-action-cmd", stdout)
         self.assertIn("--team-state-root", stdout)
@@ -436,21 +452,18 @@ Use action "explain-toolbar-state".
         self.assertIn("--observe-duration", stdout)
 
     def test_observe_and_ax_tree_help_surface_expected_flags(self):
-        observe = run_cli("observe", "--help")
-        observe_stdout = observe.stdout.lower()
+        observe_stdout = help_bundle()["observe"].lower()
         self.assertIn("--action", observe_stdout)
         self.assertIn("--action-cmd", observe_stdout)
         self.assertIn("observation packet", observe_stdout)
 
-        ax_tree = run_cli("ax-tree", "--help")
-        ax_stdout = ax_tree.stdout.lower()
+        ax_stdout = help_bundle()["ax-tree"].lower()
         self.assertIn("--depth", ax_stdout)
         self.assertIn("--json", ax_stdout)
         self.assertIn("accessibility", ax_stdout)
 
     def test_act_help_and_dry_run_payload(self):
-        help_proc = run_cli("act", "--help")
-        help_stdout = help_proc.stdout.lower()
+        help_stdout = help_bundle()["act"].lower()
         self.assertIn("--click", help_stdout)
         self.assertIn("--click-rel", help_stdout)
         self.assertIn("--text", help_stdout)
@@ -473,7 +486,7 @@ Use action "explain-toolbar-state".
             "--dry-run",
             "--json",
         )
-        payload = json.loads(dry_proc.stdout)
+        payload = loads(dry_proc.stdout)
         self.assertTrue(payload["dry_run"])
         self.assertEqual(payload["process_name"], "DemoApp")
         action_types = [item["type"] for item in payload["actions"]]
@@ -484,74 +497,71 @@ Use action "explain-toolbar-state".
         self.assertIn("enter", action_types)
 
     def test_observe_json_contains_packet_fields_for_explain_pipeline(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            out_dir = tmp / "observe"
-            proc = run_cli(
-                "observe",
-                "--process",
-                "DemoApp",
-                "--action",
-                "explain-app-state",
-                "--duration",
-                "0",
-                "--out-dir",
-                str(out_dir),
-                "--json",
-            )
-            payload = json.loads(proc.stdout)
-
-            self.assertEqual(payload["action"]["label"], "explain-app-state")
-            self.assertIn("before_capture", payload)
-            self.assertIn("after_capture", payload)
-            self.assertIn("clip", payload)
-            self.assertIn("diff", payload)
-            self.assertIn("change_regions", payload["diff"])
-            self.assertTrue(Path(payload["before_capture"]["capture_path"]).exists())
-            self.assertTrue(Path(payload["after_capture"]["capture_path"]).exists())
-            self.assertTrue(Path(payload["action"]["log_path"]).exists())
-            self.assertTrue(Path(payload["clip"]["video_path"]).exists())
-
-    def test_observe_duration_three_waits_multiple_seconds(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            out_dir = tmp / "observe-duration"
-            start = time.monotonic()
-            proc = run_cli(
-                "observe",
-                "--process",
-                "DemoApp",
-                "--action",
-                "timing-check",
-                "--duration",
-                "3",
-                "--out-dir",
-                str(out_dir),
-                "--json",
-            )
-            elapsed = time.monotonic() - start
-            payload = json.loads(proc.stdout)
-            self.assertEqual(payload["clip"]["duration_sec"], 3)
-            self.assertGreaterEqual(elapsed, 2.5)
+        out_dir = self.tmp / "observe"
+        proc = run_cli(
+            "observe",
+            "--process",
+            "DemoApp",
+            "--action",
+            "explain-app-state",
+            "--duration",
+            "0",
+            "--out-dir",
+            str(out_dir),
+            "--json",
+        )
+        payload = loads(proc.stdout)
+
+        self.assertEqual(payload["action"]["label"], "explain-app-state")
+        self.assertIn("before_capture", payload)
+        self.assertIn("after_capture", payload)
+        self.assertIn("clip", payload)
+        self.assertIn("diff", payload)
+        self.assertIn("change_regions", payload["diff"])
+        self.assertTrue(Path(payload["before_capture"]["capture_path"]).exists())
+        self.assertTrue(Path(payload["after_capture"]["capture_path"]).exists())
+        self.assertTrue(Path(payload["action"]["log_path"]).exists())
+        self.assertTrue(Path(payload["clip"]["video_path"]).exists())
+
+    def test_observe_duration_three_waits_scaled_duration(self):
+        out_dir = self.tmp / "observe-duration"
+        start = time.monotonic()
+        proc = run_cli(
+            "observe",
+            "--process",
+            "DemoApp",
+            "--action",
+            "timing-check",
+            "--duration",
+            "3",
+            "--out-dir",
+            str(out_dir),
+            "--json",
+            env_updates={"OMX_VISUAL_LOOP_TIME_SCALE": "0.05"},
+        )
+        elapsed = time.monotonic() - start
+        payload = loads(proc.stdout)
+        self.assertEqual(payload["clip"]["duration_sec"], 3)
+        # 3 s scaled by 0.05 sleeps ~0.15 s; an unscaled wait would exceed the cap.
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 2.5)
 
     def test_explain_app_generates_packet_prompt_report_without_codex(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            out_dir = tmp / "explain"
-            proc = run_cli(
-                "explain-app",
-                "--process",
-                "DemoApp",
-                "--no-codex",
-                "--out-dir",
-                str(out_dir),
-                "--json",
-            )
-            payload = json.loads(proc.stdout)
-            self.assertEqual(payload["mode"], "fallback")
-            self.assertTrue(Path(payload["packet_path"]).exists())
-            self.assertTrue(Path(payload["prompt_path"]).exists())
-            self.assertTrue(Path(payload["report_path"]).exists())
+        out_dir = self.tmp / "explain"
+        proc = run_cli(
+            "explain-app",
+            "--process",
+            "DemoApp",
+            "--no-codex",
+            "--out-dir",
+            str(out_dir),
+            "--json",
+        )
+        payload = loads(proc.stdout)
+        self.assertEqual(payload["mode"], "fallback")
+        self.assertTrue(Path(payload["packet_path"]).exists())
+        self.assertTrue(Path(payload["prompt_path"]).exists())
+        self.assertTrue(Path(payload["report_path"]).exists())
 
 
 if __name__ == "__main__":
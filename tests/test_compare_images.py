@@ -0,0 +1,163 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from _shared import TmpDirMixin  # noqa: E402
+from _tinypng import rect_png, white_png  # noqa: E402
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "codex-visual-loop-plugin" / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+import compare_images  # noqa: E402
+
+
+def _regions(mask: np.ndarray, scale: int, min_pixels: int = 1) -> list:
+    return compare_images._extract_change_regions(mask, min_pixels=min_pixels, pad=0, max_boxes=0, scale=scale)
+
+
+def _u_shapes() -> np.ndarray:
+    # Two nested U's whose arms only join on the bottom rows, so the run
+    # union-find has to merge labels after several separate rows.
+    mask = np.zeros((12, 16), dtype=bool)
+    mask[0:10, 1] = mask[0:10, 6] = mask[9, 1:7] = True
+    mask[0:11, 9] = mask[0:11, 14] = mask[10, 9:15] = True
+    mask[2:6, 11:13] = True
+    return mask
+
+
+def _diagonal() -> np.ndarray:
+    # Corner-touching pixels are separate components under 4-connectivity.
+    mask = np.zeros((7, 7), dtype=bool)
+    for i in range(7):
+        mask[i, i] = True
+        mask[i, 6 - i] = True
+    return mask
+
+
+def _single_pixel() -> np.ndarray:
+    mask = np.zeros((5, 7), dtype=bool)
+    mask[3, 4] = True
+    return mask
+
+
+_LABEL_MASKS = {
+    "empty": np.zeros((6, 9), dtype=bool),
+    "full": np.ones((4, 5), dtype=bool),
+    "single_pixel": _single_pixel(),
+    "u_shapes": _u_shapes(),
+    "diagonal": _diagonal(),
+    "random": np.random.default_rng(7).random((40, 60)) < 0.45,
+}
+
+
+class LabelBackendTests(unittest.TestCase):
+    def assert_backend_matches_scipy(self, label) -> None:
+        rng = np.random.default_rng(11)
+        for name, mask in _LABEL_MASKS.items():
+            weights = rng.integers(1, 17, size=mask.shape) * mask
+            for weighted in (False, True):
+                with self.subTest(mask=name, weighted=weighted):
+                    expected = compare_images._label_components_scipy(mask, weights if weighted else None)
+                    actual = label(mask, weights if weighted else None)
+                    for column, (want, got) in zip(("min_x", "min_y", "max_x", "max_y", "pixels"), zip(expected, actual)):
+                        self.assertTrue(np.array_equal(want, got), f"{column}: {want} != {got}")
+
+    def test_flood_fill_matches_scipy(self):
+        self.assert_backend_matches_scipy(compare_images._label_components_flood)
+
+    def test_run_length_jit_matches_scipy(self):
+        if compare_images._run_length_jit() is None:
+            self.skipTest("numba not installed")
+        self.assert_backend_matches_scipy(compare_images._label_components_jit)
+
+    def test_u_shapes_merge_into_one_component_each(self):
+        pixels = compare_images._label_components_flood(_u_shapes())[4]
+        self.assertEqual(pixels.tolist(), [24, 26, 8])
+
+    def test_diagonal_pixels_stay_separate(self):
+        self.assertEqual(len(compare_images._label_components_flood(_diagonal())[0]), 13)
+
+
+class BboxScaleTests(TmpDirMixin, unittest.TestCase):
+    def assert_covers(self, region: dict, x: int, y: int) -> None:
+        self.assertLessEqual(region["x"], x)
+        self.assertLessEqual(region["y"], y)
+        self.assertGreater(region["x"] + region["w"], x)
+        self.assertGreater(region["y"] + region["h"], y)
+
+    def test_thin_line_survives_every_scale(self):
+        mask = np.zeros((100, 100), dtype=bool)
+        mask[:, 51] = True
+        for scale in (1, 2, 3, 4):
+            with self.subTest(scale=scale):
+                regions = _regions(mask, scale, min_pixels=10)
+                self.assertEqual(len(regions), 1)
+                self.assert_covers(regions[0], 51, 0)
+                self.assert_covers(regions[0], 51, 99)
+                self.assertLessEqual(regions[0]["w"], scale)
+
+    def test_single_pixel_at_odd_offsets(self):
+        for y, x in ((0, 0), (33, 67), (1, 98), (97, 5)):
+            mask = np.zeros((100, 100), dtype=bool)
+            mask[y, x] = True
+            for scale in (2, 3, 5):
+                with self.subTest(x=x, y=y, scale=scale):
+                    regions = _regions(mask, scale)
+                    self.assertEqual(len(regions), 1)
+                    self.assert_covers(regions[0], x, y)
+
+    def test_boxes_are_clipped_to_non_multiple_frames(self):
+        mask = np.zeros((101, 103), dtype=bool)
+        mask[100, 102] = True
+        mask[0, 0] = True
+        for scale in (2, 4, 7):
+            with self.subTest(scale=scale):
+                regions = _regions(mask, scale)
+                self.assertEqual(len(regions), 2)
+                for region in regions:
+                    self.assertLessEqual(region["x2"], 103)
+                    self.assertLessEqual(region["y2"], 101)
+                    self.assertLessEqual(region["pixels"], region["area"])
+                self.assert_covers(regions[1], 102, 100)
+
+    def test_isolated_speckles_stay_below_min_area(self):
+        mask = np.zeros((1080, 1920), dtype=bool)
+        rng = np.random.default_rng(3)
+        # One speckle per 16x16 cell keeps them isolated at every tested scale.
+        cells = rng.choice(67 * 120, size=300, replace=False)
+        mask[(cells // 120) * 16 + 5, (cells % 120) * 16 + 9] = True
+        for scale in (1, 2, 4, 8):
+            with self.subTest(scale=scale):
+                self.assertEqual(_regions(mask, scale, min_pixels=64), [])
+
+    def test_pixels_are_real_counts(self):
+        mask = np.zeros((64, 64), dtype=bool)
+        mask[5:15, 3:13] = True
+        mask[40, 40] = True
+        for scale in (2, 4, 8):
+            with self.subTest(scale=scale):
+                self.assertEqual([region["pixels"] for region in _regions(mask, scale)], [100, 1])
+
+    def test_cli_bbox_scale_keeps_one_pixel_line(self):
+        baseline = self.tmp / "baseline.png"
+        current = self.tmp / "current.png"
+        baseline.write_bytes(white_png(120, 80))
+        current.write_bytes(rect_png(120, 80, 61, 0, 61, 79))
+
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPTS / "compare_images.py"), str(baseline), str(current), "--bbox-scale", "4"],
+            check=True,
+            capture_output=True,
+        )
+
+        payload = json.loads(proc.stdout)
+        self.assertEqual(payload["change_region_count"], 1)
+        self.assert_covers(payload["change_regions"][0], 61, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()